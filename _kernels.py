@@ -0,0 +1,364 @@
+import math
+import numpy as np
+from numba import njit, prange
+
+
+@njit(cache=True)
+def rolling_mean(values, window):
+    """
+    Simple moving average using a running sum (O(n) regardless of window).
+
+    Args:
+        values: 1D float64 array
+        window: Number of observations in each window
+
+    Returns:
+        Array of the same length, NaN for the first window - 1 entries and,
+        like rolling(window).mean(), while a NaN is inside the window
+    """
+    out = np.empty_like(values)
+    total = 0.0
+    # NaNs are kept out of the running sum and counted instead, so the
+    # average recovers once they leave the window
+    nan_count = 0
+
+    for i in range(values.shape[0]):
+        if np.isnan(values[i]):
+            nan_count += 1
+        else:
+            total += values[i]
+        if i >= window:
+            if np.isnan(values[i - window]):
+                nan_count -= 1
+            else:
+                total -= values[i - window]
+        out[i] = total / window if i >= window - 1 and nan_count == 0 else np.nan
+
+    return out
+
+
+@njit(cache=True)
+def rolling_mean_pair(values, fast_window, slow_window):
+    """
+    Two simple moving averages of the same array in a single pass.
+
+    Args:
+        values: 1D float64 array
+        fast_window, slow_window: Window lengths of the two averages
+
+    Returns:
+        Tuple (fast, slow) of arrays, NaN during each warm-up and while a NaN
+        is inside the window (as rolling_mean)
+    """
+    fast = np.empty_like(values)
+    slow = np.empty_like(values)
+    fast_total = 0.0
+    slow_total = 0.0
+    fast_nans = 0
+    slow_nans = 0
+
+    for i in range(values.shape[0]):
+        if np.isnan(values[i]):
+            fast_nans += 1
+            slow_nans += 1
+        else:
+            fast_total += values[i]
+            slow_total += values[i]
+        if i >= fast_window:
+            if np.isnan(values[i - fast_window]):
+                fast_nans -= 1
+            else:
+                fast_total -= values[i - fast_window]
+        if i >= slow_window:
+            if np.isnan(values[i - slow_window]):
+                slow_nans -= 1
+            else:
+                slow_total -= values[i - slow_window]
+        fast[i] = fast_total / fast_window if i >= fast_window - 1 and fast_nans == 0 else np.nan
+        slow[i] = slow_total / slow_window if i >= slow_window - 1 and slow_nans == 0 else np.nan
+
+    return fast, slow
+
+
+@njit(cache=True)
+def price_features(close, high, low, open_):
+    """
+    Compute the daily price features in a single pass over the OHLC arrays.
+
+    Args:
+        close, high, low, open_: 1D float64 arrays of equal length
+
+    Returns:
+        Tuple (daily_return, log_return, daily_range_pct, gap_pct)
+    """
+    n = close.shape[0]
+    daily_return = np.empty_like(close)
+    log_return = np.empty_like(close)
+    daily_range_pct = np.empty_like(close)
+    gap_pct = np.empty_like(close)
+
+    if n == 0:
+        return daily_return, log_return, daily_range_pct, gap_pct
+
+    daily_return[0] = np.nan
+    log_return[0] = np.nan
+    daily_range_pct[0] = (high[0] - low[0]) / low[0] * 100
+    gap_pct[0] = np.nan
+
+    for i in range(1, n):
+        prev_close = close[i - 1]
+        daily_return[i] = close[i] / prev_close - 1
+        log_return[i] = math.log1p(daily_return[i])
+        daily_range_pct[i] = (high[i] - low[i]) / low[i] * 100
+        gap_pct[i] = (open_[i] - prev_close) / prev_close * 100
+
+    return daily_return, log_return, daily_range_pct, gap_pct
+
+
+@njit(cache=True)
+def summary_stats(values):
+    """
+    Mean, min, max and sample std of an array in a single pass (NaNs skipped).
+
+    Uses Welford's update for the variance to stay accurate on large values.
+    """
+    count = 0
+    mean = 0.0
+    m2 = 0.0
+    min_value = np.inf
+    max_value = -np.inf
+
+    for v in values:
+        if np.isnan(v):
+            continue
+        count += 1
+        delta = v - mean
+        mean += delta / count
+        m2 += delta * (v - mean)
+        if v < min_value:
+            min_value = v
+        if v > max_value:
+            max_value = v
+
+    if count == 0:
+        return np.nan, np.nan, np.nan, np.nan
+    std = np.sqrt(m2 / (count - 1)) if count > 1 else np.nan
+    return mean, min_value, max_value, std
+
+
+@njit(cache=True, parallel=True)
+def stock_metrics(closes):
+    """
+    Per-column price and daily return statistics of a (T, N) closes matrix.
+
+    Columns are processed in parallel; NaN returns are skipped.
+
+    Returns:
+        Tuple (price_start, price_end, returns_mean, returns_std) of 1D arrays
+    """
+    n_rows, n_cols = closes.shape
+    price_start = np.empty(n_cols)
+    price_end = np.empty(n_cols)
+    returns_mean = np.empty(n_cols)
+    returns_std = np.empty(n_cols)
+
+    for j in prange(n_cols):
+        price_start[j] = closes[0, j]
+        price_end[j] = closes[n_rows - 1, j]
+
+        count = 0
+        mean = 0.0
+        m2 = 0.0
+        for i in range(1, n_rows):
+            r = closes[i, j] / closes[i - 1, j] - 1
+            if np.isnan(r):
+                continue
+            count += 1
+            delta = r - mean
+            mean += delta / count
+            m2 += delta * (r - mean)
+
+        returns_mean[j] = mean if count > 0 else np.nan
+        returns_std[j] = np.sqrt(m2 / (count - 1)) if count > 1 else np.nan
+
+    return price_start, price_end, returns_mean, returns_std
+
+
+@njit(cache=True)
+def rsi(close, period):
+    """
+    RSI with exponential smoothing of gains and losses (span = period).
+
+    Same recursion as pandas ewm(span=period, adjust=False).mean(), streamed
+    in a single pass.
+
+    Returns:
+        Array of the same length as close, NaN where undefined
+    """
+    n = close.shape[0]
+    out = np.empty_like(close)
+    alpha = 2.0 / (period + 1)
+    avg_gain = 0.0
+    avg_loss = 0.0
+
+    for i in range(n):
+        if i > 0:
+            delta = close[i] - close[i - 1]
+            gain = delta if delta > 0 else 0.0
+            loss = -delta if delta < 0 else 0.0
+            avg_gain = alpha * gain + (1 - alpha) * avg_gain
+            avg_loss = alpha * loss + (1 - alpha) * avg_loss
+
+        if avg_loss > 0:
+            out[i] = 100 - 100 / (1 + avg_gain / avg_loss)
+        elif avg_gain > 0:
+            out[i] = 100.0
+        else:
+            out[i] = np.nan
+
+    return out
+
+
+@njit(cache=True)
+def hold_signal(enter, exit_):
+    """
+    Long/flat state from entry and exit events, held until the opposite event.
+
+    Args:
+        enter, exit_: Boolean arrays of equal length (exit wins if both are set)
+
+    Returns:
+        int8 array, 1 while long and 0 while flat
+    """
+    out = np.empty(enter.shape[0], dtype=np.int8)
+    state = 0
+
+    for i in range(enter.shape[0]):
+        if exit_[i]:
+            state = 0
+        elif enter[i]:
+            state = 1
+        out[i] = state
+
+    return out
+
+
+@njit(cache=True)
+def drawdown(equity):
+    """
+    Drawdown curve and maximum drawdown of an equity curve (NaNs skipped).
+
+    Returns:
+        Tuple (drawdown_pct, max_dd_pct, max_dd_pos, peak_pos, recovery_pos);
+        positions are -1 when undefined (e.g. no recovery yet)
+    """
+    n = equity.shape[0]
+    drawdown_pct = np.empty_like(equity)
+    running_max = -np.inf
+    running_max_pos = -1
+    max_dd_pct = np.inf
+    max_dd_pos = -1
+    peak_pos = -1
+
+    for i in range(n):
+        value = equity[i]
+        if np.isnan(value):
+            drawdown_pct[i] = np.nan
+            continue
+        if value > running_max:
+            running_max = value
+            running_max_pos = i
+        dd = (value - running_max) / running_max * 100
+        drawdown_pct[i] = dd
+        if dd < max_dd_pct:
+            max_dd_pct = dd
+            max_dd_pos = i
+            peak_pos = running_max_pos
+
+    if max_dd_pos < 0:
+        return drawdown_pct, np.nan, -1, -1, -1
+
+    # First time the equity gets back to the peak preceding the max drawdown
+    recovery_pos = -1
+    for i in range(max_dd_pos, n):
+        if equity[i] >= equity[peak_pos]:
+            recovery_pos = i
+            break
+
+    return drawdown_pct, max_dd_pct, max_dd_pos, peak_pos, recovery_pos
+
+
+@njit(cache=True)
+def mac_backtest(close, fast_window, slow_window, initial_capital):
+    """
+    Moving average crossover backtest on a close array.
+
+    Mirrors moving_average_crossover_strategy: long while the fast average is
+    above the slow one (from row fast_window on), trading at the next close.
+
+    Returns:
+        Tuple (signal, equity, final_equity); equity starts at initial_capital
+        on the first row where both averages are defined. Rows where the close
+        or an average is NaN (warm-up, or around missing closes) are skipped
+        as the strategy does: their equity is NaN and the next return is
+        measured from the last valid row
+    """
+    n = close.shape[0]
+    ma_fast, ma_slow = rolling_mean_pair(close, fast_window, slow_window)
+    signal = np.zeros(n, dtype=np.int8)
+    equity = np.full(n, np.nan)
+    start = max(fast_window, slow_window, 2) - 1
+    value = np.nan
+    prev = -1
+
+    for i in range(fast_window, n):
+        if ma_fast[i] > ma_slow[i]:
+            signal[i] = 1
+
+    for i in range(start, n):
+        if np.isnan(close[i]) or np.isnan(ma_fast[i]) or np.isnan(ma_slow[i]):
+            continue
+        if prev < 0:
+            value = initial_capital
+        else:
+            value *= 1 + signal[prev] * (close[i] / close[prev] - 1)
+        equity[i] = value
+        prev = i
+
+    return signal, equity, value
+
+
+@njit(cache=True, parallel=True)
+def mac_grid(close, fast_windows, slow_windows, initial_capital):
+    """
+    Final equity of mac_backtest for every (fast, slow) window pair.
+
+    Returns:
+        Array of shape (len(fast_windows), len(slow_windows))
+    """
+    n_fast = fast_windows.shape[0]
+    n_slow = slow_windows.shape[0]
+    final_equity = np.empty((n_fast, n_slow))
+
+    for k in prange(n_fast * n_slow):
+        i = k // n_slow
+        j = k % n_slow
+        final_equity[i, j] = mac_backtest(close, fast_windows[i], slow_windows[j],
+                                          initial_capital)[2]
+
+    return final_equity
+
+
+# Compile (or load from the numba on-disk cache) at import, so the JIT cost
+# isn't paid on the first real call
+rolling_mean(np.zeros(32), 20)
+rolling_mean_pair(np.zeros(32), 5, 20)
+rolling_mean_pair(np.zeros(32, dtype=np.float32), 5, 20)
+price_features(np.ones(32), np.ones(32), np.ones(32), np.ones(32))
+summary_stats(np.ones(8))
+stock_metrics(np.ones((8, 2)))
+rsi(np.ones(32), 14)
+rsi(np.ones(32, dtype=np.float32), 14)
+hold_signal(np.zeros(8, dtype=np.bool_), np.zeros(8, dtype=np.bool_))
+drawdown(np.ones(8))
+mac_grid(np.ones(32), np.array([2, 3]), np.array([5, 8]), 1.0)
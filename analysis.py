@@ -1,6 +1,8 @@
 import pandas as pd
 import numpy as np
 
+from _kernels import stock_metrics, summary_stats
+
 
 def calculate_stock_metrics(data):
     """
@@ -12,28 +14,54 @@ def calculate_stock_metrics(data):
     Returns:
         Dictionary with metrics
     """
-    price_start = data['Close'].iloc[0]
-    price_end = data['Close'].iloc[-1]
+    closes = data['Close'].to_numpy(dtype=np.float64)
+    price_start = closes[0]
+    price_end = closes[-1]
 
     # Total return percentage
     total_return = ((price_end - price_start) / price_start) * 100
 
-    # Volatility (annualized standard deviation of daily returns)
-    daily_returns = data['Close'].pct_change().dropna()
-    volatility = daily_returns.std() * np.sqrt(252) * 100
+    # Daily returns statistics, each reduction computed once
+    daily_returns = np.diff(closes) / closes[:-1]
+    daily_returns = daily_returns[~np.isnan(daily_returns)]
+    returns_mean = daily_returns.mean()
+    returns_std = daily_returns.std(ddof=1)
 
     metrics = {
         'price_start': price_start,
         'price_end': price_end,
         'total_return': total_return,
-        'volatility': volatility,
-        'daily_returns_mean': daily_returns.mean() * 100,
-        'daily_returns_std': daily_returns.std() * 100
+        # Volatility (annualized standard deviation of daily returns)
+        'volatility': returns_std * np.sqrt(252) * 100,
+        'daily_returns_mean': returns_mean * 100,
+        'daily_returns_std': returns_std * 100
     }
 
     return metrics
 
 
+def _stack_closes(stocks_data):
+    """
+    Stack the 'Close' series of several stocks into a single 2D array.
+
+    Args:
+        stocks_data: Dictionary with ticker as key and DataFrame as value
+
+    Returns:
+        Tuple (index, closes) where closes has shape (T, N), or None if the
+        stocks do not share the same date index
+    """
+    frames = list(stocks_data.values())
+    index = frames[0].index
+
+    for data in frames[1:]:
+        if not data.index.equals(index):
+            return None
+
+    closes = np.column_stack([data['Close'].to_numpy(dtype=np.float64) for data in frames])
+    return index, closes
+
+
 def analyze_multiple_stocks(stocks_data):
     """
     Analyze multiple stocks and return comparative metrics.
@@ -44,14 +72,35 @@ def analyze_multiple_stocks(stocks_data):
     Returns:
         DataFrame with comparative metrics for all stocks
     """
-    results = []
+    if not stocks_data:
+        return pd.DataFrame()
+
+    stacked = _stack_closes(stocks_data)
 
-    for ticker, data in stocks_data.items():
-        metrics = calculate_stock_metrics(data)
-        metrics['ticker'] = ticker
-        results.append(metrics)
+    # Stocks with different trading histories can't be stacked, analyze them one by one
+    if stacked is None:
+        results = []
+        for ticker, data in stocks_data.items():
+            metrics = calculate_stock_metrics(data)
+            metrics['ticker'] = ticker
+            results.append(metrics)
+        return pd.DataFrame(results)
 
-    return pd.DataFrame(results)
+    _, closes = stacked
+
+    # All metrics in one pass over the (T, N) matrix, tickers in parallel
+    price_start, price_end, returns_mean, returns_std = stock_metrics(closes)
+    total_return = ((price_end - price_start) / price_start) * 100
+
+    return pd.DataFrame({
+        'price_start': price_start,
+        'price_end': price_end,
+        'total_return': total_return,
+        'volatility': returns_std * np.sqrt(252) * 100,
+        'daily_returns_mean': returns_mean * 100,
+        'daily_returns_std': returns_std * 100,
+        'ticker': list(stocks_data)
+    })
 
 
 def find_high_volume_days(data, threshold=2.0):
@@ -68,7 +117,8 @@ def find_high_volume_days(data, threshold=2.0):
     if 'Volume_Ratio' not in data.columns:
         raise ValueError("Data must have 'Volume_Ratio' column. Use prepare_stock_data().")
 
-    return data[data['Volume_Ratio'] > threshold]
+    rows = np.flatnonzero(data['Volume_Ratio'].to_numpy() > threshold)
+    return data.take(rows)
 
 
 def find_high_volatility_days(data, n=10):
@@ -85,7 +135,22 @@ def find_high_volatility_days(data, n=10):
     if 'Daily_Range_Pct' not in data.columns:
         raise ValueError("Data must have 'Daily_Range_Pct' column. Use prepare_stock_data().")
 
-    return data.nlargest(n, 'Daily_Range_Pct')
+    values = data['Daily_Range_Pct'].to_numpy()
+    rows = np.flatnonzero(~np.isnan(values))
+    if n <= 0:
+        rows = rows[:0]
+    elif n < len(rows):
+        # Find the n-th largest value in O(T), then sort only the top n rows.
+        # argpartition picks arbitrary rows among ties at the boundary, so
+        # those are taken in positional order, as nlargest does
+        candidates = values[rows]
+        kth = candidates[np.argpartition(-candidates, n - 1)[n - 1]]
+        above = rows[candidates > kth]
+        tied = rows[candidates == kth][:n - len(above)]
+        rows = np.sort(np.concatenate((above, tied)))
+
+    rows = rows[np.argsort(-values[rows], kind='stable')]
+    return data.take(rows)
 
 
 def calculate_volume_stats(data):
@@ -98,12 +163,16 @@ def calculate_volume_stats(data):
     Returns:
         Dictionary with volume statistics
     """
+    volume = data['Volume'].to_numpy(dtype=np.float64)
+    mean, min_value, max_value, std = summary_stats(volume)
+    valid = volume[~np.isnan(volume)]
+
     return {
-        'mean': data['Volume'].mean(),
-        'median': data['Volume'].median(),
-        'max': data['Volume'].max(),
-        'min': data['Volume'].min(),
-        'std': data['Volume'].std()
+        'mean': mean,
+        'median': np.median(valid) if len(valid) else np.nan,
+        'max': max_value,
+        'min': min_value,
+        'std': std
     }
 
 
@@ -119,7 +188,45 @@ def calculate_correlation(data, col1, col2):
     Returns:
         Correlation coefficient
     """
-    return data[col1].corr(data[col2].abs())
+    x = data[col1].to_numpy(dtype=np.float64)
+    y = np.abs(data[col2].to_numpy(dtype=np.float64))
+
+    valid = ~(np.isnan(x) | np.isnan(y))
+    if valid.sum() < 2:
+        return np.nan
+
+    dx = x[valid] - x[valid].mean()
+    dy = y[valid] - y[valid].mean()
+    return np.einsum('i,i->', dx, dy) / np.sqrt(np.einsum('i,i->', dx, dx) * np.einsum('i,i->', dy, dy))
+
+
+def calculate_correlation_matrix(stocks_data):
+    """
+    Calculate the correlation matrix of daily returns across stocks.
+
+    Args:
+        stocks_data: Dictionary with ticker as key and DataFrame as value
+
+    Returns:
+        DataFrame with tickers as both index and columns
+    """
+    tickers = list(stocks_data)
+    stacked = _stack_closes(stocks_data) if stocks_data else None
+
+    # Stocks with different trading histories: let pandas align the dates
+    if stacked is None:
+        closes = pd.DataFrame({ticker: data['Close'] for ticker, data in stocks_data.items()})
+        return closes.pct_change().corr()
+
+    _, closes = stacked
+    returns = np.diff(closes, axis=0) / closes[:-1]
+    returns = returns[~np.isnan(returns).any(axis=1)]
+
+    # Standardize, then all pairwise correlations in a single matrix product
+    z = (returns - returns.mean(axis=0)) / returns.std(axis=0, ddof=1)
+    corr = np.einsum('ti,tj->ij', z, z) / (len(returns) - 1)
+
+    return pd.DataFrame(corr, index=tickers, columns=tickers)
 
 
 def normalize_prices(stocks_data, base=100):
@@ -131,11 +238,18 @@ def normalize_prices(stocks_data, base=100):
         base: Base value for normalization (default: 100)
 
     Returns:
-        Dictionary with normalized price series
+        DataFrame with one normalized price column per ticker
     """
-    normalized = {}
+    stacked = _stack_closes(stocks_data) if stocks_data else None
+
+    # Stocks with different trading histories: normalize each one and align the dates
+    if stacked is None:
+        return pd.DataFrame({
+            ticker: (data['Close'] / data['Close'].iloc[0]) * base
+            for ticker, data in stocks_data.items()
+        })
 
-    for ticker, data in stocks_data.items():
-        normalized[ticker] = (data['Close'] / data['Close'].iloc[0]) * base
+    index, closes = stacked
+    normalized = closes / closes[0] * base
 
-    return normalized
\ No newline at end of file
+    return pd.DataFrame(normalized, index=index, columns=list(stocks_data))
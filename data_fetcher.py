@@ -1,22 +1,77 @@
+import hashlib
+import os
+import time
 import pandas as pd
 import numpy as np
 import yfinance as yf
 from datetime import datetime, timedelta
 
+from _kernels import price_features, rolling_mean
 
-def download_stock_data(ticker, start_date=None, end_date=None, period='1y'):
+
+# Local parquet cache for downloaded data
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache')
+CACHE_MAX_AGE = 24 * 60 * 60  # seconds
+
+# Window of the volume moving average used by prepare_stock_data
+VOLUME_MA_WINDOW = 20
+
+
+def _cache_path(ticker, start_date, end_date, period):
+    """
+    Build the cache file path for a download request.
+
+    Dates are reduced to the calendar day so that repeated runs on the same
+    day (e.g. with datetime.now() as end date) hit the same entry.
+    """
+    if start_date and end_date:
+        start_date = pd.Timestamp(start_date).date()
+        end_date = pd.Timestamp(end_date).date()
+    key = hashlib.sha1(f"{ticker}|{start_date}|{end_date}|{period}".encode()).hexdigest()
+    return os.path.join(CACHE_DIR, f"{key}.parquet")
+
+
+def _read_cache(path):
+    """Return the cached DataFrame at path, or None if missing, stale or unreadable."""
+    try:
+        if time.time() - os.path.getmtime(path) > CACHE_MAX_AGE:
+            return None
+        return pd.read_parquet(path)
+    except (OSError, ImportError, ValueError):
+        return None
+
+
+def _write_cache(path, data):
+    """Write data to the cache, ignoring failures (e.g. pyarrow not installed)."""
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        data.to_parquet(path, compression='zstd')
+    except (OSError, ImportError, ValueError) as e:
+        print(f"Could not cache data: {e}")
+
+
+def download_stock_data(ticker, start_date=None, end_date=None, period='1y', use_cache=True):
     """
     Download stock data from Yahoo Finance.
 
+    Results are cached locally as parquet files for CACHE_MAX_AGE seconds.
+
     Args:
         ticker: Stock symbol (e.g., 'AAPL')
         start_date: Start date for download
         end_date: End date for download
         period: Period string (e.g., '1y', '2y') if dates not provided
+        use_cache: If True, read from and write to the local cache
 
     Returns:
         DataFrame with stock data
     """
+    if use_cache:
+        cache_path = _cache_path(ticker, start_date, end_date, period)
+        cached = _read_cache(cache_path)
+        if cached is not None:
+            return cached
+
     try:
         if start_date and end_date:
             data = yf.download(ticker, start=start_date, end=end_date, progress=False)
@@ -27,30 +82,102 @@ def download_stock_data(ticker, start_date=None, end_date=None, period='1y'):
         if isinstance(data.columns, pd.MultiIndex):
             data.columns = data.columns.get_level_values(0)
 
+        if use_cache and not data.empty:
+            _write_cache(cache_path, data)
+
         return data
     except Exception as e:
         print(f"Error downloading {ticker}: {e}")
         return None
 
 
-def download_multiple_stocks(tickers, start_date=None, end_date=None, period='1y'):
+def _download_batch(tickers, start_date=None, end_date=None, period='1y'):
+    """
+    Download several tickers with a single yfinance request.
+
+    Args:
+        tickers: List of stock symbols
+        start_date: Start date for download
+        end_date: End date for download
+        period: Period string if dates not provided
+
+    Returns:
+        Dictionary with ticker as key and DataFrame as value, only for the
+        tickers that came back with data
+    """
+    if start_date and end_date:
+        raw = yf.download(tickers, start=start_date, end=end_date, group_by='ticker',
+                          progress=False, threads=True)
+    else:
+        raw = yf.download(tickers, period=period, group_by='ticker',
+                          progress=False, threads=True)
+
+    if not isinstance(raw.columns, pd.MultiIndex):
+        return {}
+
+    downloaded = set(raw.columns.get_level_values(0))
+    batch = {}
+    for ticker in tickers:
+        if ticker in downloaded:
+            data = raw[ticker].dropna(how='all')
+            if not data.empty:
+                batch[ticker] = data
+
+    return batch
+
+
+def download_multiple_stocks(tickers, start_date=None, end_date=None, period='1y',
+                             use_cache=True):
     """
     Download data for multiple stock tickers.
 
+    Tickers not found in the local cache are fetched with a single batched
+    yfinance request (downloaded concurrently by yfinance itself). Any ticker
+    the batch misses falls back to an individual download. yf.download keeps
+    its results in module-level state, so these run one at a time.
+
     Args:
         tickers: List of stock symbols
         start_date: Start date for download
         end_date: End date for download
         period: Period string if dates not provided
+        use_cache: If True, read from and write to the local cache
 
     Returns:
         Dictionary with ticker as key and DataFrame as value
     """
+    fetched = {}
+
+    if use_cache:
+        for ticker in tickers:
+            cached = _read_cache(_cache_path(ticker, start_date, end_date, period))
+            if cached is not None:
+                fetched[ticker] = cached
+
+    missing = [ticker for ticker in tickers if ticker not in fetched]
+
+    if missing:
+        try:
+            batch = _download_batch(missing, start_date, end_date, period)
+        except Exception as e:
+            print(f"Batch download failed, downloading one by one: {e}")
+            batch = {}
+
+        if use_cache:
+            for ticker, data in batch.items():
+                _write_cache(_cache_path(ticker, start_date, end_date, period), data)
+        fetched.update(batch)
+
+    missing = [ticker for ticker in missing if ticker not in fetched]
+
+    for ticker in missing:
+        fetched[ticker] = download_stock_data(ticker, start_date, end_date, period, use_cache)
+
     stocks_data = {}
 
     for ticker in tickers:
         print(f"⬇️  Downloading {ticker}...", end=" ")
-        data = download_stock_data(ticker, start_date, end_date, period)
+        data = fetched.get(ticker)
 
         if data is not None and not data.empty:
             stocks_data[ticker] = data
@@ -75,30 +202,35 @@ def prepare_stock_data(ticker, period='1y'):
     print(f"📥 Downloading {ticker}...")
     df = download_stock_data(ticker, period=period)
 
+    # Drop rows with missing prices or volume before computing the features,
+    # otherwise the gap shifts the warm-up and leaks NaNs into the results.
+    # The frame is only filtered when something is actually missing
+    if df is not None:
+        missing = np.isnan(df.to_numpy(dtype=np.float64)).any(axis=1)
+        if missing.any():
+            df = df[~missing]
+
     if df is None or df.empty:
         return None
 
-    # Remove any rows with missing values
-    df = df.dropna()
-
-    # Calculate daily returns
-    df['Daily_Return'] = df['Close'].pct_change()
-
-    # Calculate log returns
-    df['Log_Return'] = np.log(df['Close'] / df['Close'].shift(1))
-
-    # Daily range percentage
-    df['Daily_Range_Pct'] = ((df['High'] - df['Low']) / df['Low']) * 100
-
-    # Gap from previous close
-    df['Gap_Pct'] = ((df['Open'] - df['Close'].shift(1)) / df['Close'].shift(1)) * 100
+    # Daily return, log return, intraday range % and gap from previous close
+    daily_return, log_return, daily_range_pct, gap_pct = price_features(
+        df['Close'].to_numpy(dtype=np.float64),
+        df['High'].to_numpy(dtype=np.float64),
+        df['Low'].to_numpy(dtype=np.float64),
+        df['Open'].to_numpy(dtype=np.float64)
+    )
+    df['Daily_Return'] = daily_return
+    df['Log_Return'] = log_return
+    df['Daily_Range_Pct'] = daily_range_pct
+    df['Gap_Pct'] = gap_pct
 
     # Volume ratio vs 20-day moving average
-    df['Volume_MA20'] = df['Volume'].rolling(window=20).mean()
+    df['Volume_MA20'] = rolling_mean(df['Volume'].to_numpy(dtype=np.float64), VOLUME_MA_WINDOW)
     df['Volume_Ratio'] = df['Volume'] / df['Volume_MA20']
 
-    # Remove rows with NaN created by calculations
-    df = df.dropna()
+    # Remove the warm-up rows: Volume_MA20 is the last feature to become valid
+    df = df.iloc[VOLUME_MA_WINDOW - 1:]
 
     print(f"✅ {ticker}: {len(df)} days of data prepared")
     print(f"📅 Period: {df.index[0].date()} → {df.index[-1].date()}")
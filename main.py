@@ -1,3 +1,5 @@
+import logging
+import sys
 from datetime import datetime, timedelta
 import matplotlib.pyplot as plt
 
@@ -7,14 +9,24 @@ from analysis import (
     find_high_volume_days,
     find_high_volatility_days,
     calculate_volume_stats,
-    calculate_correlation
+    calculate_correlation,
+    calculate_correlation_matrix
 )
 from plotting import setup_plot_style, plot_multiple_stocks, plot_price_and_volume
-from strategy import analyze_trades_detailed, analyze_drawdown, moving_average_crossover_strategy
+from strategy import (
+    analyze_trades_detailed,
+    analyze_drawdown,
+    plot_drawdown,
+    moving_average_crossover_strategy
+)
 
 def main():
     """Main analysis script for stock data."""
 
+    # Show the strategy reports logged by strategy.py
+    logging.basicConfig(format='%(message)s', stream=sys.stdout)
+    logging.getLogger('strategy').setLevel(logging.INFO)
+
     # Configure plotting style
     setup_plot_style()
 
@@ -43,12 +55,22 @@ def main():
 
     metrics_df = analyze_multiple_stocks(stocks_data)
 
-    for _, row in metrics_df.iterrows():
-        print(f"{row['ticker']:<10} ${row['price_start']:<14.2f} ${row['price_end']:<14.2f} "
-              f"{row['total_return']:<11.2f}% {row['volatility']:<14.2f}%")
+    rows = zip(metrics_df['ticker'].to_numpy(), metrics_df['price_start'].to_numpy(),
+               metrics_df['price_end'].to_numpy(), metrics_df['total_return'].to_numpy(),
+               metrics_df['volatility'].to_numpy())
+    print("\n".join(
+        f"{ticker:<10} ${price_start:<14.2f} ${price_end:<14.2f} "
+        f"{total_return:<11.2f}% {volatility:<14.2f}%"
+        for ticker, price_start, price_end, total_return, volatility in rows
+    ))
 
     print("="*80)
 
+    # Correlation of daily returns across all stocks
+    corr_matrix = calculate_correlation_matrix(stocks_data)
+    print("\n🔗 DAILY RETURNS CORRELATION MATRIX:")
+    print(corr_matrix.round(2))
+
     # Plot comparative charts
     plot_multiple_stocks(stocks_data, normalized=False)
 
@@ -109,7 +131,7 @@ def main():
 
         # Visualizza i primi segnali
         print("\n🎯 PRIMI SEGNALI GENERATI:")
-        trades = results[results['Position'] != 0][['Close', 'MA_Fast', 'MA_Slow', 'Position']].head(10)
+        trades = results.loc[results['Position'].to_numpy() != 0, ['Close', 'Position']].head(10)
         trades['Action'] = trades['Position'].map({1: '🟢 BUY', -1: '🔴 SELL'})
         print(trades[['Close', 'Action']])
 
@@ -189,7 +211,8 @@ def main():
 
 
         # Esegui analisi drawdown
-        analyze_drawdown(results)
+        dd_info = analyze_drawdown(results)
+        plot_drawdown(dd_info)
 
 
 
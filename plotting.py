@@ -1,5 +1,12 @@
+import numpy as np
 import matplotlib.pyplot as plt
 
+from analysis import normalize_prices
+
+
+# Above this many rows, price/volume bars are drawn from weekly data
+MAX_DAILY_BARS = 500
+
 
 def setup_plot_style():
     """Configure matplotlib style for professional-looking charts."""
@@ -17,12 +24,15 @@ def plot_multiple_stocks(stocks_data, normalized=False):
     """
     fig, axes = plt.subplots(2, 1, figsize=(14, 10))
 
+    # Normalized prices are shared by both charts, compute them once
+    normalized_prices = normalize_prices(stocks_data, base=100)
+    tickers = list(normalized_prices.columns)
+
     # Chart 1: Absolute or normalized prices
     if normalized:
         axes[0].set_title('Normalized Performance (base 100)', fontsize=14, fontweight='bold')
-        for ticker, data in stocks_data.items():
-            normalized_prices = (data['Close'] / data['Close'].iloc[0]) * 100
-            axes[0].plot(normalized_prices.index, normalized_prices, label=ticker, linewidth=2)
+        axes[0].plot(normalized_prices.index, normalized_prices.to_numpy(),
+                     label=tickers, linewidth=2)
         axes[0].set_ylabel('Performance (base 100)', fontsize=12)
         axes[0].axhline(y=100, color='black', linestyle='--', alpha=0.5)
     else:
@@ -36,9 +46,8 @@ def plot_multiple_stocks(stocks_data, normalized=False):
 
     # Chart 2: Normalized performance
     axes[1].set_title('Normalized Performance (base 100)', fontsize=14, fontweight='bold')
-    for ticker, data in stocks_data.items():
-        normalized = (data['Close'] / data['Close'].iloc[0]) * 100
-        axes[1].plot(normalized.index, normalized, label=ticker, linewidth=2)
+    axes[1].plot(normalized_prices.index, normalized_prices.to_numpy(),
+                 label=tickers, linewidth=2)
 
     axes[1].set_ylabel('Performance (base 100)', fontsize=12)
     axes[1].set_xlabel('Date', fontsize=12)
@@ -61,13 +70,23 @@ def plot_price_and_volume(data, ticker):
     fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(14, 8),
                                     gridspec_kw={'height_ratios': [3, 1]})
 
-    # Calculate colors based on daily movement
-    colors = ['green' if close >= open_price else 'red'
-              for close, open_price in zip(data['Close'], data['Open'])]
-
-    # Chart 1: Price with daily range bars
-    ax1.bar(data.index, data['High'] - data['Low'],
-            bottom=data['Low'], width=0.6, color=colors, alpha=0.3)
+    # Long series: one bar per week instead of per day (the close line stays daily)
+    bars = data
+    bar_width = 1
+    if len(data) > MAX_DAILY_BARS:
+        bars = data.resample('W').agg({
+            'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last',
+            # Average daily volume, to stay on the same scale as the volume MA
+            'Volume': 'mean'
+        }).dropna()
+        bar_width = 5
+
+    # Calculate colors based on each bar's movement
+    bar_colors = np.where(bars['Close'].to_numpy() >= bars['Open'].to_numpy(), 'green', 'red')
+
+    # Chart 1: Price with range bars
+    ax1.bar(bars.index, bars['High'] - bars['Low'],
+            bottom=bars['Low'], width=0.6 * bar_width, color=bar_colors, alpha=0.3)
     ax1.plot(data.index, data['Close'], color='black', linewidth=1.5, label='Close')
     ax1.set_title(f'{ticker} - Price and Volume', fontsize=14, fontweight='bold')
     ax1.set_ylabel('Price ($)', fontsize=12)
@@ -75,9 +94,7 @@ def plot_price_and_volume(data, ticker):
     ax1.grid(True, alpha=0.3)
 
     # Chart 2: Volume bars
-    volume_colors = ['green' if close >= open_price else 'red'
-                     for close, open_price in zip(data['Close'], data['Open'])]
-    ax2.bar(data.index, data['Volume'], color=volume_colors, alpha=0.7)
+    ax2.bar(bars.index, bars['Volume'], width=0.8 * bar_width, color=bar_colors, alpha=0.7)
     ax2.set_ylabel('Volume', fontsize=12)
     ax2.set_xlabel('Date', fontsize=12)
     ax2.grid(True, alpha=0.3)
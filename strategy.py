@@ -1,7 +1,81 @@
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import yfinance as yf
+
+from _kernels import drawdown, hold_signal, mac_grid, rolling_mean_pair, rsi
+from data_fetcher import download_stock_data
+
+logger = logging.getLogger(__name__)
+
+def _pair_trades(position):
+    """
+    Accoppia ogni BUY con il primo SELL successivo.
+    
+    Parameters:
+    - position: array della colonna Position (1 = BUY, -1 = SELL)
+    
+    Returns:
+    - trade_num: numero progressivo del BUY di ogni trade (da 1)
+    - entry_pos, exit_pos: posizioni intere di entrata e uscita
+    """
+    buy_pos = np.flatnonzero(position == 1)
+    sell_pos = np.flatnonzero(position == -1)
+    
+    # Primo SELL strettamente successivo a ogni BUY
+    next_sell = np.searchsorted(sell_pos, buy_pos, side='right')
+    paired = next_sell < len(sell_pos)
+    
+    return np.flatnonzero(paired) + 1, buy_pos[paired], sell_pos[next_sell[paired]]
+
+
+def _trades_frame(results, initial_capital, indicators=()):
+    """
+    Costruisce il DataFrame dei trade direttamente da array tipizzati.
+    
+    Parameters:
+    - results: DataFrame della strategia (Close, Position e indicatori)
+    - initial_capital: capitale investito in ogni trade
+    - indicators: colonne da riportare all'entrata e all'uscita (es. 'RSI')
+    
+    Returns:
+    - DataFrame con una riga per trade
+    """
+    
+    # Colonne come array NumPy, una volta sola
+    close = results['Close'].to_numpy()
+    dates = results.index.to_numpy()
+    
+    # Pairing: ogni BUY con il successivo SELL
+    trade_num, entry_pos, exit_pos = _pair_trades(results['Position'].to_numpy())
+    
+    entry_price = close[entry_pos]
+    exit_price = close[exit_pos]
+    
+    # Calcola P&L
+    pnl_pct = ((exit_price - entry_price) / entry_price) * 100
+    pnl_dollar = (exit_price - entry_price) * (initial_capital / entry_price)
+    
+    entry_columns = {'Entry_Date': dates[entry_pos], 'Entry_Price': entry_price}
+    exit_columns = {'Exit_Date': dates[exit_pos], 'Exit_Price': exit_price}
+    for name in indicators:
+        values = results[name].to_numpy()
+        entry_columns[f'Entry_{name}'] = values[entry_pos]
+        exit_columns[f'Exit_{name}'] = values[exit_pos]
+    
+    return pd.DataFrame({
+        'Trade_Num': trade_num.astype(np.int32),
+        **entry_columns,
+        **exit_columns,
+        'PnL_%': pnl_pct,
+        'PnL_$': pnl_dollar,
+        'Holding_Days': ((dates[exit_pos] - dates[entry_pos]) // np.timedelta64(1, 'D')).astype(np.int32),
+        'Result': np.where(pnl_pct > 0, 'WIN', 'LOSS')
+    })
+
 
 def analyze_trades_detailed(results, initial_capital=10000):
     """
@@ -11,102 +85,104 @@ def analyze_trades_detailed(results, initial_capital=10000):
     - DataFrame con tutti i trade
     - Metriche dettagliate
     """
+    return _trades_frame(results, initial_capital)
+
+
+def compute_drawdown(results):
+    """
+    Calcola le metriche di drawdown della strategia (senza stampa né grafici).
     
-    # Identifica i punti di entrata (BUY) e uscita (SELL)
-    buy_signals = results[results['Position'] == 1].copy()
-    sell_signals = results[results['Position'] == -1].copy()
+    Returns:
+    - Dizionario con drawdown_pct (Series), max_drawdown (%), peak_date,
+      bottom_date e recovery_date (None se non ancora recuperato)
+    """
     
-    trades_list = []
+    # Running maximum, drawdown %, max drawdown, peak e recovery in un solo passaggio
+    drawdown_pct, max_dd_value, max_dd_pos, peak_pos, recovery_pos = drawdown(
+        results['Strategy_Equity'].to_numpy(dtype=np.float64)
+    )
     
-    # Pairing: ogni BUY con il successivo SELL
-    for i in range(min(len(buy_signals), len(sell_signals))):
-        entry_date = buy_signals.index[i]
-        entry_price = buy_signals['Close'].iloc[i]
-        
-        # Trova il primo SELL dopo questo BUY
-        future_sells = sell_signals[sell_signals.index > entry_date]
-        if len(future_sells) > 0:
-            exit_date = future_sells.index[0]
-            exit_price = future_sells['Close'].iloc[0]
-            
-            # Calcola P&L
-            pnl_pct = ((exit_price - entry_price) / entry_price) * 100
-            pnl_dollar = (exit_price - entry_price) * (initial_capital / entry_price)
-            
-            # Holding period
-            holding_days = (exit_date - entry_date).days
-            
-            trade = {
-                'Trade_Num': i + 1,
-                'Entry_Date': entry_date,
-                'Entry_Price': entry_price,
-                'Exit_Date': exit_date,
-                'Exit_Price': exit_price,
-                'PnL_%': pnl_pct,
-                'PnL_$': pnl_dollar,
-                'Holding_Days': holding_days,
-                'Result': 'WIN' if pnl_pct > 0 else 'LOSS'
-            }
-            trades_list.append(trade)
-    
-    trades_df = pd.DataFrame(trades_list)
-    
-    return trades_df
-
-
-def analyze_drawdown(results):
+    # Il kernel restituisce -1 se l'equity non ha valori validi
+    if max_dd_pos < 0:
+        raise ValueError("Strategy_Equity non contiene valori validi: drawdown non calcolabile")
+    
+    return {
+        'drawdown_pct': pd.Series(drawdown_pct, index=results.index),
+        'max_drawdown': max_dd_value,
+        # Quando è iniziato il drawdown (ultimo peak prima del max DD)
+        'peak_date': results.index[peak_pos],
+        'bottom_date': results.index[max_dd_pos],
+        # Quando si è recuperato (se si è recuperato)
+        'recovery_date': results.index[recovery_pos] if recovery_pos >= 0 else None
+    }
+
+
+def analyze_drawdown(results, verbose=True):
     """
     Analisi dettagliata del drawdown della strategia.
-    """
-    
-    equity = results['Strategy_Equity']
-    
-    # Calcola running maximum
-    running_max = equity.cummax()
     
-    # Drawdown in dollari e percentuale
-    drawdown_dollars = equity - running_max
-    drawdown_pct = (drawdown_dollars / running_max) * 100
+    Scrive il report sul logger; per il grafico usare plot_drawdown sul risultato.
     
-    # Trova il max drawdown
-    max_dd_idx = drawdown_pct.idxmin()
-    max_dd_value = drawdown_pct.min()
+    Parameters:
+    - verbose: se False calcola solo le metriche, senza formattare il report
     
-    # Trova quando è iniziato il drawdown (ultimo peak prima del max DD)
-    peak_idx = running_max[:max_dd_idx].idxmax()
+    Returns:
+    - Dizionario di compute_drawdown
+    """
     
-    # Trova quando si è recuperato (se si è recuperato)
-    recovery_idx = None
-    peak_value = running_max[peak_idx]
-    future_equity = equity[max_dd_idx:]
+    dd_info = compute_drawdown(results)
+    if not verbose:
+        return dd_info
     
-    if len(future_equity[future_equity >= peak_value]) > 0:
-        recovery_idx = future_equity[future_equity >= peak_value].index[0]
+    max_dd_value = dd_info['max_drawdown']
+    peak_idx = dd_info['peak_date']
+    max_dd_idx = dd_info['bottom_date']
+    recovery_idx = dd_info['recovery_date']
     
-    print("\n📉 ANALISI DRAWDOWN:")
-    print("="*60)
-    print(f"Max Drawdown: {max_dd_value:.2f}%")
-    print(f"Peak prima del DD: {peak_idx.date()}")
-    print(f"Bottom del DD: {max_dd_idx.date()}")
+    logger.info("\n📉 ANALISI DRAWDOWN:")
+    logger.info("="*60)
+    logger.info(f"Max Drawdown: {max_dd_value:.2f}%")
+    logger.info(f"Peak prima del DD: {peak_idx.date()}")
+    logger.info(f"Bottom del DD: {max_dd_idx.date()}")
     
     if recovery_idx:
-        print(f"Recovery: {recovery_idx.date()}")
+        logger.info(f"Recovery: {recovery_idx.date()}")
         dd_duration = (max_dd_idx - peak_idx).days
         recovery_duration = (recovery_idx - max_dd_idx).days
         total_duration = (recovery_idx - peak_idx).days
-        print(f"\nDurata DD: {dd_duration} giorni")
-        print(f"Durata Recovery: {recovery_duration} giorni")
-        print(f"Durata totale: {total_duration} giorni")
+        logger.info(f"\nDurata DD: {dd_duration} giorni")
+        logger.info(f"Durata Recovery: {recovery_duration} giorni")
+        logger.info(f"Durata totale: {total_duration} giorni")
     else:
-        print(f"Recovery: Non ancora recuperato!")
+        logger.info(f"Recovery: Non ancora recuperato!")
+    
+    logger.info("="*60)
+    
+    return dd_info
+
+
+def plot_drawdown(dd_info, show=True):
+    """
+    Grafico del drawdown nel tempo.
     
-    print("="*60)
+    Parameters:
+    - dd_info: dizionario restituito da compute_drawdown / analyze_drawdown
+    - show: se False non chiama plt.show() (uso headless/batch)
+    
+    Returns:
+    - Figure matplotlib
+    """
+    # Import locale: matplotlib non serve (e non va caricato) nei calcoli
+    import matplotlib.pyplot as plt
+    
+    drawdown_pct = dd_info['drawdown_pct']
+    max_dd_idx = dd_info['bottom_date']
+    max_dd_value = dd_info['max_drawdown']
     
-    # Plot drawdown
     fig, ax = plt.subplots(figsize=(14, 6))
     
-    ax.fill_between(results.index, 0, drawdown_pct, color='red', alpha=0.3)
-    ax.plot(results.index, drawdown_pct, color='red', linewidth=2)
+    ax.fill_between(drawdown_pct.index, 0, drawdown_pct, color='red', alpha=0.3)
+    ax.plot(drawdown_pct.index, drawdown_pct, color='red', linewidth=2)
     ax.axhline(y=0, color='black', linestyle='-', linewidth=1)
     
     # Evidenzia il max drawdown
@@ -120,16 +196,75 @@ def analyze_drawdown(results):
     ax.grid(True, alpha=0.3)
     
     plt.tight_layout()
-    plt.show()
+    if show:
+        plt.show()
+    
+    return fig
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import yfinance as yf
+
+def _load_prices(ticker, start_date, end_date, dtype=np.float64):
+    """
+    Scarica i prezzi giornalieri, usando la cache parquet locale di data_fetcher.
+    
+    Parameters:
+    - dtype: tipo numerico delle colonne OHLCV
+    
+    Returns:
+    - DataFrame con colonne OHLCV già appiattite (niente MultiIndex)
+    """
+    df = download_stock_data(ticker, start_date, end_date)
+    
+    if df is None or df.empty:
+        raise ValueError(f"Nessun dato disponibile per {ticker}")
+    
+    return df.astype(dtype)
+
+
+def _backtest_returns(close, signal, initial_capital):
+    """
+    Calcola rendimenti ed equity curve direttamente sugli array NumPy.
+    
+    Parameters:
+    - close: array dei prezzi di chiusura
+    - signal: array del segnale (1 = long, 0 = flat)
+    - initial_capital: capitale iniziale
+    
+    Returns:
+    - Dizionario con Returns, Strategy_Returns, Buy_Hold_Equity, Strategy_Equity
+    """
+    # Tutte le operazioni scrivono in buffer preallocati (out=), senza array temporanei
+    n = len(close)
+    returns = np.empty(n, dtype=close.dtype)
+    returns[:1] = np.nan
+    np.divide(close[1:], close[:-1], out=returns[1:])
+    np.subtract(returns[1:], 1, out=returns[1:])
+    
+    # Posizione del giorno precedente applicata al rendimento di oggi
+    strategy_returns = np.empty(n, dtype=close.dtype)
+    strategy_returns[:1] = np.nan
+    np.multiply(signal[:-1], returns[1:], out=strategy_returns[1:])
+    
+    columns = {'Returns': returns, 'Strategy_Returns': strategy_returns}
+    
+    # Equity curve: come cumprod() di pandas, i NaN restano NaN e non interrompono il prodotto
+    for name, rets in (('Buy_Hold_Equity', returns), ('Strategy_Equity', strategy_returns)):
+        missing = np.isnan(rets)
+        equity = np.add(rets, 1)
+        equity[missing] = 1
+        np.cumprod(equity, out=equity)
+        np.multiply(equity, initial_capital, out=equity)
+        equity[missing] = np.nan
+        columns[name] = equity
+    
+    return columns
+
 
 def moving_average_crossover_strategy(ticker, start_date, end_date, 
                                        fast_period=50, slow_period=200,
-                                       initial_capital=10000):
+                                       initial_capital=10000, verbose=True,
+                                       dtype=np.float32):
     """
     Implementa una strategia Moving Average Crossover.
     
@@ -139,6 +274,9 @@ def moving_average_crossover_strategy(ticker, start_date, end_date,
     - fast_period: periodo media mobile veloce (default 50)
     - slow_period: periodo media mobile lenta (default 200)
     - initial_capital: capitale iniziale in $
+    - verbose: se False non scrive nulla sul logger (es. nei worker di run_sweep)
+    - dtype: precisione dei calcoli; float32 dimezza la memoria letta da
+      medie mobili e cumprod, np.float64 per la precisione piena
     
     Returns:
     - DataFrame con segnali e performance
@@ -146,84 +284,135 @@ def moving_average_crossover_strategy(ticker, start_date, end_date,
     """
     
     # Scarica dati
-    print(f"📥 Scaricando dati {ticker}...")
-    df = yf.download(ticker, start=start_date, end=end_date, progress=False, ignore_tz=True)
-    
-    # Fix MultiIndex
-    if isinstance(df.columns, pd.MultiIndex):
-        df.columns = df.columns.get_level_values(0)
+    if verbose:
+        logger.info(f"📥 Scaricando dati {ticker}...")
+    df = _load_prices(ticker, start_date, end_date, dtype)
     
     # Calcola medie mobili
-    df['MA_Fast'] = df['Close'].rolling(window=fast_period).mean()
-    df['MA_Slow'] = df['Close'].rolling(window=slow_period).mean()
-    
-    # Genera segnali di trading
-    df['Signal'] = 0  # 0 = nessun segnale
-    df['Signal'][fast_period:] = np.where(
-        df['MA_Fast'][fast_period:] > df['MA_Slow'][fast_period:], 1, 0
+    ma_fast, ma_slow = rolling_mean_pair(
+        df['Close'].to_numpy(), fast_period, slow_period
     )
+    df['MA_Fast'] = ma_fast
+    df['MA_Slow'] = ma_slow
+    
+    # Genera segnali di trading (0 = nessun segnale, 1 = long)
+    signal = np.zeros(len(df), dtype=np.int8)
+    signal[fast_period:] = ma_fast[fast_period:] > ma_slow[fast_period:]
+    df['Signal'] = signal
     
     # Identifica i punti di entrata/uscita (quando il segnale cambia)
-    df['Position'] = df['Signal'].diff()
+    df['Position'] = np.diff(signal, prepend=np.nan)
     # Position: 1 = BUY signal, -1 = SELL signal, 0 = hold
     
-    # Rimuovi le prime righe con NaN
-    df = df.dropna()
+    # Rimuovi le righe di warm-up (medie mobili non ancora definite, Position della prima riga)
+    warmup = max(fast_period, slow_period, 2) - 1
+    df = df.iloc[warmup:]
     
-    # Calcola rendimenti della strategia
-    df['Returns'] = df['Close'].pct_change()
-    df['Strategy_Returns'] = df['Signal'].shift(1) * df['Returns']
+    # Giorni con dati mancanti (e medie mobili non definite attorno ad essi):
+    # si scartano e i rendimenti si calcolano a cavallo del buco
+    close = df['Close'].to_numpy()
+    missing = np.isnan(close) | np.isnan(ma_fast[warmup:]) | np.isnan(ma_slow[warmup:])
+    if missing.any():
+        df = df[~missing]
     
-    # Calcola equity curve (valore portafoglio nel tempo)
-    df['Buy_Hold_Equity'] = initial_capital * (1 + df['Returns']).cumprod()
-    df['Strategy_Equity'] = initial_capital * (1 + df['Strategy_Returns']).cumprod()
+    # Calcola rendimenti della strategia ed equity curve (valore portafoglio nel tempo)
+    df = df.assign(**_backtest_returns(df['Close'].to_numpy(),
+                                       df['Signal'].to_numpy(), initial_capital))
     
-    print(f"✅ Strategia calcolata su {len(df)} giorni")
-    print(f"📅 Periodo: {df.index[0].date()} → {df.index[-1].date()}")
+    if verbose:
+        logger.info(f"✅ Strategia calcolata su {len(df)} giorni")
+        logger.info(f"📅 Periodo: {df.index[0].date()} → {df.index[-1].date()}")
     
     return df
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import yfinance as yf
 
-def calculate_rsi(data, period=14):
+def _rsi_lfilter(close, period):
+    """RSI con le EMA di gain e loss calcolate come filtro IIR (scipy.signal.lfilter)."""
+    from scipy.signal import lfilter
+    
+    alpha = 2 / (period + 1)
+    delta = np.diff(close, prepend=close[:1])
+    
+    # s_t = alpha * x_t + (1 - alpha) * s_{t-1}, stessa ricorsione di ewm(adjust=False).
+    # Un delta NaN (prezzo mancante) conta come 0, come in pandas e nel kernel Numba:
+    # altrimenti il filtro propagherebbe il NaN a tutti i campioni successivi
+    avg_gain = lfilter([alpha], [1, alpha - 1], np.where(delta > 0, delta, 0))
+    avg_loss = lfilter([alpha], [1, alpha - 1], np.where(delta < 0, -delta, 0))
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (100 - 100 / (1 + avg_gain / avg_loss)).astype(close.dtype)
+
+
+def calculate_rsi(data, period=14, engine='numba'):
     """
     Calcola RSI (Relative Strength Index).
     
     Parameters:
     - data: Series dei prezzi di chiusura
     - period: periodo per il calcolo (default 14)
+    - engine: 'numba' (default) oppure 'lfilter' (richiede scipy)
     
     Returns:
     - Series con valori RSI
     """
-    # Calcola i cambiamenti di prezzo
-    delta = data.diff()
+    close = data.to_numpy(dtype=np.result_type(data.dtype, np.float32))
     
-    # Separa gain e loss
-    gain = delta.where(delta > 0, 0)
-    loss = -delta.where(delta < 0, 0)
+    if engine == 'numba':
+        # Media esponenziale di gain e loss e RSI in un solo passaggio
+        values = rsi(close, period)
+    elif engine == 'lfilter':
+        values = _rsi_lfilter(close, period)
+    else:
+        raise ValueError(f"engine non valido: {engine!r} (usa 'numba' o 'lfilter')")
     
-    # Calcola media mobile esponenziale (EMA) di gain e loss
-    avg_gain = gain.ewm(span=period, adjust=False).mean()
-    avg_loss = loss.ewm(span=period, adjust=False).mean()
+    return pd.Series(values, index=data.index, name=data.name)
+
+
+@lru_cache(maxsize=128)
+def _ema_weights(length, alpha, dtype):
+    """Pesi geometrici dell'EMA (adjust=False) per una finestra di length valori."""
+    decay = (1 - alpha) ** np.arange(length - 1, -1, -1, dtype=np.float64)
+    weights = alpha * decay
+    weights[0] = decay[0]  # il primo valore inizializza l'EMA
+    
+    weights = weights.astype(dtype)
+    weights.flags.writeable = False
+    return weights
+
+
+def ema_dotprod(x, alpha):
+    """
+    Valore finale dell'EMA (come ewm(alpha=alpha, adjust=False)) come prodotto scalare.
     
-    # Calcola RS (Relative Strength)
-    rs = avg_gain / avg_loss
+    I pesi vengono calcolati una volta per (lunghezza, alpha, dtype) e riusati:
+    utile negli sweep che ricalcolano l'EMA su finestre della stessa lunghezza.
     
-    # Calcola RSI
-    rsi = 100 - (100 / (1 + rs))
+    Parameters:
+    - x: array 1D di una finestra, oppure 2D con una finestra per riga
+    - alpha: fattore di smoothing (es. 2 / (span + 1))
     
-    return rsi
+    Returns:
+    - EMA all'ultimo valore (scalare, o un valore per riga se x è 2D)
+    """
+    x = np.asarray(x)
+    if x.ndim == 0 or x.shape[-1] == 0:
+        raise ValueError("ema_dotprod richiede finestre con almeno un valore")
+    if not np.issubdtype(x.dtype, np.floating):
+        x = x.astype(np.float64)
+    
+    # Un'unica GEMV (BLAS) per tutte le finestre
+    return x @ _ema_weights(x.shape[-1], float(alpha), x.dtype)
 
 
 def rsi_mean_reversion_strategy(ticker, start_date, end_date, 
                                   rsi_period=14, 
                                   oversold=30, 
                                   overbought=70,
-                                  initial_capital=10000):
+                                  initial_capital=10000,
+                                  verbose=True,
+                                  dtype=np.float32):
     """
     Implementa strategia RSI Mean Reversion.
     
@@ -234,89 +423,120 @@ def rsi_mean_reversion_strategy(ticker, start_date, end_date,
     - oversold: soglia oversold per BUY (default 30)
     - overbought: soglia overbought per SELL (default 70)
     - initial_capital: capitale iniziale
+    - verbose: se False non scrive nulla sul logger (es. nei worker di run_sweep)
+    - dtype: precisione dei calcoli; float32 dimezza la memoria letta da
+      medie mobili e cumprod, np.float64 per la precisione piena
     
     Returns:
     - DataFrame con segnali e performance
     """
     
     # Scarica dati
-    print(f"📥 Scaricando dati {ticker}...")
-    df = yf.download(ticker, start=start_date, end=end_date, progress=False, ignore_tz=True)
-    
-    # Fix MultiIndex
-    if isinstance(df.columns, pd.MultiIndex):
-        df.columns = df.columns.get_level_values(0)
+    if verbose:
+        logger.info(f"📥 Scaricando dati {ticker}...")
+    df = _load_prices(ticker, start_date, end_date, dtype)
     
     # Calcola RSI
     df['RSI'] = calculate_rsi(df['Close'], period=rsi_period)
     
-    # Genera segnali
-    df['Signal'] = 0  # 0 = hold, 1 = long position
-    
-    # BUY quando RSI < oversold (asset sottovalutato)
-    df.loc[df['RSI'] < oversold, 'Signal'] = 1
+    # Genera segnali: 1 = long position, 0 = flat
+    rsi_values = df['RSI'].to_numpy()
     
-    # SELL quando RSI > overbought (asset sopravalutato)
-    df.loc[df['RSI'] > overbought, 'Signal'] = 0
-    
-    # Forward fill: mantieni la posizione finché non arriva segnale opposto
-    df['Signal'] = df['Signal'].replace(0, np.nan).ffill().fillna(0)
+    # BUY quando RSI < oversold (asset sottovalutato),
+    # SELL quando RSI > overbought (asset sopravalutato),
+    # mantieni la posizione finché non arriva il segnale opposto
+    df['Signal'] = hold_signal(rsi_values < oversold, rsi_values > overbought)
     
     # Identifica i punti di entrata/uscita
-    df['Position'] = df['Signal'].diff()
+    df['Position'] = np.diff(df['Signal'].to_numpy(), prepend=np.nan)
+    
+    # Giorni con prezzo mancante: si scartano prima dei rendimenti,
+    # che si calcolano a cavallo del buco
+    missing = np.isnan(df['Close'].to_numpy())
+    if missing.any():
+        df = df[~missing]
+        rsi_values = df['RSI'].to_numpy()
     
-    # Calcola rendimenti
-    df['Returns'] = df['Close'].pct_change()
-    df['Strategy_Returns'] = df['Signal'].shift(1) * df['Returns']
+    # Righe di warm-up: la prima (Returns e Position non definiti) più quelle
+    # iniziali in cui l'RSI non è ancora definito (prezzi fermi, gain e loss nulli)
+    warmup = max(int(np.argmax(~np.isnan(rsi_values))) if len(rsi_values) else 0, 1)
     
-    # Equity curve
-    df['Buy_Hold_Equity'] = initial_capital * (1 + df['Returns']).cumprod()
-    df['Strategy_Equity'] = initial_capital * (1 + df['Strategy_Returns']).cumprod()
+    # Calcola rendimenti ed equity curve
+    df = df.assign(**_backtest_returns(df['Close'].to_numpy(),
+                                       df['Signal'].to_numpy(), initial_capital))
     
-    # Rimuovi NaN
-    df = df.dropna()
+    # Rimuovi le righe di warm-up
+    df = df.iloc[warmup:]
     
-    print(f"✅ Strategia calcolata su {len(df)} giorni")
-    print(f"📅 Periodo: {df.index[0].date()} → {df.index[-1].date()}")
+    if verbose:
+        logger.info(f"✅ Strategia calcolata su {len(df)} giorni")
+        logger.info(f"📅 Periodo: {df.index[0].date()} → {df.index[-1].date()}")
     
     return df
 
 def analyze_rsi_trades(results, initial_capital=10000):
     """Analizza trade-by-trade della strategia RSI."""
+    return _trades_frame(results, initial_capital, indicators=('RSI',))
+
+
+def run_mac_grid(close, fast_grid, slow_grid, initial_capital=10000):
+    """
+    Sweep della strategia Moving Average Crossover su una griglia di periodi.
     
-    buy_signals = results[results['Position'] == 1].copy()
-    sell_signals = results[results['Position'] == -1].copy()
-    
-    trades_list = []
-    
-    for i in range(min(len(buy_signals), len(sell_signals))):
-        entry_date = buy_signals.index[i]
-        entry_price = buy_signals['Close'].iloc[i]
-        entry_rsi = buy_signals['RSI'].iloc[i]
-        
-        future_sells = sell_signals[sell_signals.index > entry_date]
-        if len(future_sells) > 0:
-            exit_date = future_sells.index[0]
-            exit_price = future_sells['Close'].iloc[0]
-            exit_rsi = future_sells['RSI'].iloc[0]
-            
-            pnl_pct = ((exit_price - entry_price) / entry_price) * 100
-            pnl_dollar = (exit_price - entry_price) * (initial_capital / entry_price)
-            holding_days = (exit_date - entry_date).days
-            
-            trade = {
-                'Trade_Num': i + 1,
-                'Entry_Date': entry_date,
-                'Entry_Price': entry_price,
-                'Entry_RSI': entry_rsi,
-                'Exit_Date': exit_date,
-                'Exit_Price': exit_price,
-                'Exit_RSI': exit_rsi,
-                'PnL_%': pnl_pct,
-                'PnL_$': pnl_dollar,
-                'Holding_Days': holding_days,
-                'Result': 'WIN' if pnl_pct > 0 else 'LOSS'
-            }
-            trades_list.append(trade)
-    
-    return pd.DataFrame(trades_list)
+    Ogni coppia (fast, slow) viene simulata da un kernel Numba compilato,
+    in parallelo sulle coppie, senza passare da pandas.
+    
+    Parameters:
+    - close: Series o array dei prezzi di chiusura
+    - fast_grid, slow_grid: periodi da provare per la media veloce e lenta
+    - initial_capital: capitale iniziale
+    
+    Returns:
+    - DataFrame con l'equity finale (righe = fast, colonne = slow)
+    """
+    fast_grid = np.asarray(fast_grid, dtype=np.int64)
+    slow_grid = np.asarray(slow_grid, dtype=np.int64)
+    
+    final_equity = mac_grid(np.asarray(close, dtype=np.float64), fast_grid, slow_grid,
+                            float(initial_capital))
+    
+    return pd.DataFrame(final_equity,
+                        index=pd.Index(fast_grid, name='fast_period'),
+                        columns=pd.Index(slow_grid, name='slow_period'))
+
+
+def _run_job(job):
+    """Esegue un singolo job di run_sweep (funzione top-level, serializzabile)."""
+    strategy_fn, ticker, start_date, end_date, params = job
+    return strategy_fn(ticker, start_date, end_date, **{'verbose': False, **params})
+
+
+def run_sweep(strategy_fn, jobs, max_workers=None, chunksize=4):
+    """
+    Esegue una strategia su più ticker/parametri in parallelo su più processi.
+    
+    Parameters:
+    - strategy_fn: funzione strategia, es. moving_average_crossover_strategy
+    - jobs: lista di tuple (ticker, start_date, end_date, params) dove params
+      è un dizionario di argomenti per la strategia
+    - max_workers: numero di processi (default: numero di CPU)
+    - chunksize: job inviati a ogni processo per volta
+    
+    Returns:
+    - Lista dei DataFrame risultato, nello stesso ordine dei job
+    """
+    jobs = list(jobs)
+    
+    # Scarica (e mette in cache) i dati una volta sola, così i worker
+    # leggono dalla cache invece di interrogare Yahoo in parallelo
+    for ticker, start_date, end_date in dict.fromkeys((j[0], j[1], j[2]) for j in jobs):
+        _load_prices(ticker, start_date, end_date)
+    
+    # spawn invece di fork: i threading layer di Numba workqueue e OpenMP (GNU)
+    # non sono fork-safe, e spawn parte comunque da worker puliti
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count(),
+                             mp_context=context) as executor:
+        return list(executor.map(_run_job,
+                                 [(strategy_fn, *job) for job in jobs],
+                                 chunksize=chunksize))